@@ -8,11 +8,13 @@ setup(
     name='simpleca',
     version='0.1',
     py_modules=['simpleca'],
+    python_requires='>=3.6',
     install_requires=[
         'Click',
+        'cryptography>=3.1',
     ],
-    entry_points='''
-        [console_scripts]
-        simpleca=simpleca:cli
-    ''',
+    entry_points={
+        'console_scripts': ['simpleca=simpleca:cli'],
+    },
+    zip_safe=False,
 )
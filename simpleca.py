@@ -5,11 +5,17 @@ SimpleCA is a tool to easily manage a Certificate autority
 
 import fcntl
 import os
+import threading
+import warnings
+import weakref
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List
 
 import click
-from OpenSSL import crypto
-from OpenSSL.crypto import PKey, X509
+# cryptography, secrets and concurrent.futures are imported in the functions
+# using them, loading them would dominate the CLI startup time
+if TYPE_CHECKING:
+    from cryptography import x509
 
 CERT_DIR_NAME = '/certs'
 CRL_DIR_NAME = '/crl'
@@ -19,6 +25,11 @@ INDEX_NAME = '/index.txt'
 SERIAL_NAME = '/serial'
 CA_PRIVKEY_NAME = PRIVATE_DIR_NAME + '/ca.key'
 CA_SERIAL = 1000
+KEY_TYPES = ('rsa', 'ed25519')
+INDEX_SYNC_INTERVAL = 64
+# OPENSSL_ia32cap bits, see the OPENSSL_ia32cap(3) manual page
+IA32CAP_AESNI = 1 << 57
+IA32CAP_SHA = 1 << 29
 
 class SimpleCA:
     """ class handling the CA operations """
@@ -33,6 +44,22 @@ class SimpleCA:
         self.subject = 'Simple CA'
         self.commonname = 'ca'
         self.key_bits = 4096
+        self.key_type = 'rsa'
+        self.random_serials = False
+        self._ca_key = None
+        self._ca_key_name = None
+        self._ca_hash = None
+        self._ca_key_lock = threading.Lock()
+        self._index_fd = None
+        self._index_finalizer = None
+        self._index_unsynced = 0
+        self._index_lock = threading.Lock()
+        self._cert_dir = ca_dir + CERT_DIR_NAME
+        self._crl_dir = ca_dir + CRL_DIR_NAME
+        self._newcert_dir = ca_dir + NEWCERT_DIR_NAME
+        self._private_dir = ca_dir + PRIVATE_DIR_NAME
+        self._index_path = ca_dir + INDEX_NAME
+        self._serial_path = ca_dir + SERIAL_NAME
 
     def init_ca(self):
         """ Create the CA directories, initiliaze the files """
@@ -45,26 +72,92 @@ class SimpleCA:
 
         Keyword arguement:
         commonname -- the certificate subject common name
+        extensions -- the x509.Extension list
         """
 
         serial = self._get_serial()
         pkey = self._create_pkey(commonname, serial)
         self._create_cert(pkey, commonname, serial, extensions)
 
-    def _get_serial(self):
-        """ Get the current serial and increment the serial file """
-        with open(self.ca_dir + SERIAL_NAME, 'r+') as serial_file:
-            fcntl.flock(serial_file, fcntl.LOCK_EX)
-            serial = int(serial_file.read())
-            serial_file.seek(0)
-            serial_file.truncate()
-            serial_file.writelines(['%d'% (serial + 1)])
+    def new_certs(self, commonnames, extensions=None):
+        """ Create several signed certificates
+
+        RSA key pairs are generated in parallel in worker processes, the
+        certificates are then signed one by one as the keys are ready. Ed25519
+        key pairs and single certificates are generated inline, as starting the
+        workers would cost more than it saves.
+
+        Keyword arguement:
+        commonnames -- the list of certificate subject common names
+        extensions -- the x509.Extension list
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        serials = [self._get_serial() for _ in commonnames]
+        for commonname, serial in zip(commonnames, serials):
+            key_path = self._get_key_path(commonname, serial)
+            if os.path.exists(key_path):
+                raise FileExistsError(key_path)
+
+        template = self._get_cert_template(extensions, 365, datetime.utcnow())
+        key_types = [self.key_type] * len(commonnames)
+        key_bits = [self.key_bits] * len(commonnames)
+        executor = None
+        if self.key_type == 'rsa' and len(commonnames) > 1:
+            executor = ProcessPoolExecutor()
+        try:
+            if executor is None:
+                privates = map(_gen_pkey, key_types, key_bits)
+            else:
+                privates = executor.map(_gen_pkey, key_types, key_bits)
+            for commonname, serial, private in zip(commonnames, serials,
+                                                   privates):
+                pkey = self._write_pkey(commonname, serial, private)
+                self._create_cert(pkey, commonname, serial, extensions,
+                                  template=template)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def close(self):
+        """ Flush the index to disk and close it
+
+        This is also done when the instance is garbage collected or when the
+        process exits
+        """
+        with self._index_lock:
+            if self._index_fd is None:
+                return
+            self._index_finalizer()
+            self._index_fd = None
+            self._index_finalizer = None
+            self._index_unsynced = 0
+
+    def _get_serial(self) -> int:
+        """ Get the current serial and increment the serial file
+
+        When random_serials is set, a random serial is returned instead and
+        the serial file is neither read nor locked, so concurrent issuers
+        don't wait on each other
+        """
+        if self.random_serials:
+            return _rand_serial()
+        serial_fd = os.open(self._serial_path, os.O_RDWR)
+        try:
+            fcntl.flock(serial_fd, fcntl.LOCK_EX)
+            data = os.read(serial_fd, 64)
+            serial = int(data)
+            next_serial = b'%d' % (serial + 1)
+            os.pwrite(serial_fd, next_serial, 0)
+            if len(next_serial) < len(data):
+                os.ftruncate(serial_fd, len(next_serial))
+        finally:
+            os.close(serial_fd)
         return serial
 
     def _get_cert_path(self, cert_name, serial):
         """ Get the path where the certificates are stored """
-        return '%s%s/%d_%s.crt' % (self.ca_dir, CERT_DIR_NAME, serial,
-                                   cert_name)
+        return '%s/%d_%s.crt' % (self._cert_dir, serial, cert_name)
 
     def _get_cert_link(self, cert_name):
         """ Get the path were the certificate are stored without the serial
@@ -72,12 +165,11 @@ class SimpleCA:
         This should return a link to the last version of the certificate (i.e.
         with the highest serial
         """
-        return '%s%s/%s.crt' % (self.ca_dir, CERT_DIR_NAME, cert_name)
+        return '%s/%s.crt' % (self._cert_dir, cert_name)
 
     def _get_key_path(self, key_name, serial):
         """ Get the path where the private keys are stored """
-        return '%s%s/%d_%s.key' % (self.ca_dir, PRIVATE_DIR_NAME, serial,
-                                   key_name)
+        return '%s/%d_%s.key' % (self._private_dir, serial, key_name)
 
     def _get_key_link(self, key_name):
         """ Get the path were the private keys are stored without the serial
@@ -85,29 +177,33 @@ class SimpleCA:
         This should return a link to the last version of the key (i.e. with the
         highest serial
         """
-        return '%s%s/%s.key' % (self.ca_dir, PRIVATE_DIR_NAME, key_name)
+        return '%s/%s.key' % (self._private_dir, key_name)
 
     def _create_pkey(self, commonname, serial):
         """ Generate a key pair and store it in the private key directory
 
         The key file will be named from the common name
         """
-        pkey = PKey()
-        pkey.generate_key(crypto.TYPE_RSA, self.key_bits)
-        private = crypto.dump_privatekey(crypto.FILETYPE_PEM,
-                                         pkey).decode()
+        private = _gen_pkey(self.key_type, self.key_bits)
+        return self._write_pkey(commonname, serial, private)
+
+    def _write_pkey(self, commonname, serial, private):
+        """ Store a PEM encoded private key in the private key directory
+
+        Raises FileExistsError if the key file already exists. Returns the
+        loaded key pair
+        """
+        from cryptography.hazmat.primitives import serialization
+
         key_path = self._get_key_path(commonname, serial)
-        if os.path.exists(key_path):
-            raise FileExistsError(key_path)
-        with open(key_path, 'w') as private_file:
-            private_file.writelines(private)
+        _write_exclusive(key_path, private, 0o600)
 
         key_link = self._get_key_link(commonname)
         if os.path.exists(key_link):
             os.unlink(key_link)
         os.symlink(os.path.basename(key_path), key_link)
 
-        return pkey
+        return serialization.load_pem_private_key(private, None)
 
     def _create_cert(self, pkey, commonname, serial, extensions, **kwargs):
         """ Create a certificate
@@ -116,117 +212,308 @@ class SimpleCA:
         pkey -- the key pair for the certificate
         commonname -- the common name for the certificate subject
         serial -- the certificate serial number
-        extensions -- the X509Ext list
+        extensions -- the x509.Extension list
 
         Keywords arguments:
         expire -- the number for days the certificate is valid (default 365)
-        version -- the version number for the certificate (default 1)
+        template -- a builder from _get_cert_template, used instead of
+                    extensions and expire
         """
+        from cryptography.hazmat.primitives import serialization
 
-        expire_kw = 'expire'
-        if expire_kw in kwargs:
-            expire = kwargs[expire_kw]
+        template_kw = 'template'
+        if template_kw in kwargs:
+            template = kwargs[template_kw]
         else:
-            expire = 365
-
-        version_kw = 'version'
-        if version_kw in kwargs:
-            version = kwargs[version_kw]
-        else:
-            version = 1
-
-        now = datetime.utcnow()
-        cert = X509()
-        cert.get_subject().CN = commonname
-        cert.get_issuer().CN = self.commonname
-        startdate = now.strftime('%Y%m%d%H%M%SZ')
-        cert.set_notBefore(startdate.encode('ascii'))
-        enddate = (now+timedelta(expire)).strftime('%Y%m%d%H%M%SZ')
-        cert.set_notAfter(enddate.encode('ascii'))
-        cert.set_pubkey(pkey)
-        cert.set_serial_number(serial)
-        cert.set_version(version)
-
-        if extensions:
-            cert.add_extensions(extensions)
-
-        self._sign_cert(cert)
-
-        cert_pem = crypto.dump_certificate(crypto.FILETYPE_PEM,
-                                           cert).decode()
+            expire_kw = 'expire'
+            if expire_kw in kwargs:
+                expire = kwargs[expire_kw]
+            else:
+                expire = 365
+            template = self._get_cert_template(extensions, expire,
+                                               datetime.utcnow())
+
+        builder = template.subject_name(_get_cn_name(commonname))
+        builder = builder.public_key(pkey.public_key())
+        builder = builder.serial_number(serial)
+
+        cert = self._sign_cert(builder)
+
+        pretty = get_pretty_subject(cert).encode()
+        cert_pem = cert.public_bytes(serialization.Encoding.PEM)
         cert_path = self._get_cert_path(commonname, serial)
-        with open(cert_path, 'w') as cert_file:
-            cert_file.writelines(get_pretty_subject(cert))
-            cert_file.writelines(cert_pem)
+        _write_exclusive(cert_path, pretty + cert_pem, 0o644)
 
         cert_link = self._get_cert_link(commonname)
         if os.path.exists(cert_link):
             os.unlink(cert_link)
         os.symlink(os.path.basename(cert_path), cert_link)
 
+        self._append_index(cert)
+
         return cert
 
-    def _sign_cert(self, cert):
-        """ Sign the certificate with the given key """
-        with open(self._get_key_link(self.commonname), 'r') as private_file:
-            data = private_file.read()
-            pkey = crypto.load_privatekey(crypto.FILETYPE_PEM,
-                                          data)
-        cert.sign(pkey, 'sha256')
+    def _append_index(self, cert):
+        """ Add a valid certificate entry to the index
+
+        The entries use the openssl ca index format. The index stays open in
+        append mode and is only synced every INDEX_SYNC_INTERVAL entries and
+        when closed
+        """
+        # not_valid_after is deprecated since cryptography 42
+        not_after = getattr(cert, 'not_valid_after_utc', None)
+        if not_after is None:
+            not_after = cert.not_valid_after
+        # UTCTime until 2049, GeneralizedTime afterwards, as in RFC 5280
+        if not_after.year < 2050:
+            expire = not_after.strftime('%y%m%d%H%M%SZ')
+        else:
+            expire = not_after.strftime('%Y%m%d%H%M%SZ')
+        serial = '%X' % cert.serial_number
+        if len(serial) % 2:
+            serial = '0' + serial
+        entry = 'V\t%s\t\t%s\tunknown\t%s\n' % (expire, serial,
+                                                 _get_pretty_name(cert.subject))
+
+        with self._index_lock:
+            if self._index_fd is None:
+                self._index_fd = os.open(self._index_path,
+                                         os.O_WRONLY | os.O_APPEND)
+                # the finalizer must not reference self, so the instance and
+                # its descriptor can be released before the process exits
+                self._index_finalizer = weakref.finalize(self, _close_index,
+                                                         self._index_fd)
+            os.write(self._index_fd, entry.encode())
+            self._index_unsynced += 1
+            if self._index_unsynced >= INDEX_SYNC_INTERVAL:
+                _fdatasync(self._index_fd)
+                self._index_unsynced = 0
+
+    def _get_cert_template(self, extensions, expire, now):
+        """ Get a certificate builder with the fields shared by the certificates
+
+        The builders are immutable, so the template can be reused for a whole
+        batch, only the subject, public key and serial are set per certificate
+
+        Arguments:
+        extensions -- the x509.Extension list
+        expire -- the number for days the certificate is valid
+        now -- the start of the validity period
+        """
+        from cryptography import x509
+
+        builder = x509.CertificateBuilder()
+        builder = builder.issuer_name(_get_cn_name(self.commonname))
+        builder = builder.not_valid_before(now)
+        builder = builder.not_valid_after(now + timedelta(expire))
+
+        for extension in extensions or []:
+            builder = builder.add_extension(extension.value,
+                                            extension.critical)
+        return builder
+
+    def _sign_cert(self, builder):
+        """ Sign the certificate builder with the CA key
+
+        Returns the signed certificate
+        """
+        pkey, algorithm = self._get_ca_key()
+        return builder.sign(pkey, algorithm)
+
+    def _get_ca_key(self):
+        """ Get the CA private key and its signature hash algorithm
+
+        The key is loaded from disk on first use, then kept for the life of the
+        instance and only reloaded if the CA common name changes
+        """
+        with self._ca_key_lock:
+            if self._ca_key is None or self._ca_key_name != self.commonname:
+                from cryptography.hazmat.primitives import serialization
+                key_link = self._get_key_link(self.commonname)
+                with open(key_link, 'rb') as private_file:
+                    self._set_ca_key(serialization.load_pem_private_key(
+                        private_file.read(), None))
+            return self._ca_key, self._ca_hash
+
+    def _set_ca_key(self, pkey):
+        """ Cache the CA private key, _ca_key_lock must be held """
+        self._ca_key = pkey
+        self._ca_key_name = self.commonname
+        self._ca_hash = _get_sign_hash(pkey)
 
 
     def _init_dir(self):
-        """ Create the directory structure for the CA"""
-        for directory in ['', CERT_DIR_NAME, CRL_DIR_NAME, NEWCERT_DIR_NAME,
-                          PRIVATE_DIR_NAME]:
-            mode = 0o755 if directory != PRIVATE_DIR_NAME else 0o700
-            os.mkdir(self.ca_dir + directory, mode=mode)
+        """ Create the directory structure for the CA
+
+        The missing parents of the CA directory are created as well
+        """
+        os.makedirs(self.ca_dir, mode=0o755)
+        for directory, mode in ((self._cert_dir, 0o755),
+                                (self._crl_dir, 0o755),
+                                (self._newcert_dir, 0o755),
+                                (self._private_dir, 0o700)):
+            os.mkdir(directory, mode=mode)
 
     def _init_serial(self):
         """ Initialize the serial for cert id """
-        index_name = self.ca_dir + '/index.txt'
-        serial_name = self.ca_dir + '/serial'
-        with open(index_name, 'w'):
+        with open(self._index_path, 'w'):
             pass
-        with open(serial_name, 'w') as serial:
-            serial.writelines(['%d' % CA_SERIAL])
+        with open(self._serial_path, 'wb') as serial:
+            serial.write(b'%d' % CA_SERIAL)
 
     def _init_keys(self):
         """ Generate the root CA key pair """
+        from cryptography import x509
+        from cryptography.x509.oid import ExtensionOID
 
-        basic_constraints = crypto.X509Extension('basicConstraints'.encode('ascii'), True,
-                                                 'CA:TRUE, pathlen:0'.encode('ascii'))
+        basic_constraints = x509.Extension(ExtensionOID.BASIC_CONSTRAINTS, True,
+                                           x509.BasicConstraints(ca=True,
+                                                                 path_length=0))
         serial = self._get_serial()
         pkey = self._create_pkey(self.commonname, serial)
+        with self._ca_key_lock:
+            self._set_ca_key(pkey)
         self._create_cert(pkey, self.commonname, serial, [basic_constraints], expire=30*365)
 
-def _get_pretty_name(name):
-    """ Get a pretty string from a X509Name """
-    pretty = ''
-    if name.countryName:
-        pretty += '/C=' + name.countryName
-    if name.stateOrProvinceName:
-        pretty += '/ST=' + name.stateOrProvinceName
-    if name.localityName:
-        pretty += '/L=' + name.localityName
-    if name.organizationName:
-        pretty += '/O=' + name.organizationName
-    if name.organizationalUnitName:
-        pretty += '/OU=' + name.organizationalUnitName
-    if name.commonName:
-        pretty += '/CN=' + name.commonName
-    if name.emailAddress:
-        pretty += '/email=' + name.emailAddress
-    return pretty
-
-
-def get_pretty_subject(cert):
+def _get_sign_hash(pkey):
+    """ Get the hash algorithm used to sign with the given private key """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    # Ed25519 has a fixed hash and must be signed without a digest
+    if isinstance(pkey, ed25519.Ed25519PrivateKey):
+        return None
+    return hashes.SHA256()
+
+def _fdatasync(fd):
+    """ Flush a file data to disk, fdatasync is not available everywhere """
+    if hasattr(os, 'fdatasync'):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+def _close_index(fd):
+    """ Flush an index descriptor to disk and close it """
+    try:
+        _fdatasync(fd)
+    finally:
+        os.close(fd)
+
+def _write_exclusive(path, data, mode):
+    """ Write data to a new file in one go
+
+    The file is created with O_EXCL, so FileExistsError is raised atomically
+    if it already exists. A partially written file is removed on error
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    except BaseException:
+        os.close(fd)
+        os.unlink(path)
+        raise
+    os.close(fd)
+
+def _rand_serial():
+    """ Get a random positive 127 bits serial from the system CSPRNG """
+    import secrets
+    return int.from_bytes(secrets.token_bytes(16), 'big') >> 1
+
+def _gen_pkey(key_type, bits):
+    """ Generate a private key and return it PEM encoded
+
+    The key size is ignored for ed25519 keys. This is a module level function
+    so it can be run in a worker process
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    if key_type == 'rsa':
+        priv = rsa.generate_private_key(public_exponent=65537, key_size=bits)
+        key_format = serialization.PrivateFormat.TraditionalOpenSSL
+    elif key_type == 'ed25519':
+        priv = ed25519.Ed25519PrivateKey.generate()
+        key_format = serialization.PrivateFormat.PKCS8
+    else:
+        raise ValueError('Unsupported key type %s' % key_type)
+    return priv.private_bytes(serialization.Encoding.PEM, key_format,
+                              serialization.NoEncryption())
+
+def _get_cn_name(commonname):
+    """ Get a x509.Name with only the common name set """
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, commonname)])
+
+# dotted OIDs, so the table doesn't need cryptography at import time
+_NAME_FIELDS = (
+    ('2.5.4.6', '/C='),  # countryName
+    ('2.5.4.8', '/ST='),  # stateOrProvinceName
+    ('2.5.4.7', '/L='),  # localityName
+    ('2.5.4.10', '/O='),  # organizationName
+    ('2.5.4.11', '/OU='),  # organizationalUnitName
+    ('2.5.4.3', '/CN='),  # commonName
+    ('1.2.840.113549.1.9.1', '/email='),  # emailAddress
+)
+
+def _get_pretty_name(name: 'x509.Name') -> str:
+    """ Get a pretty string from a x509.Name """
+    values: Dict[str, str] = {}
+    for attribute in name:
+        values.setdefault(attribute.oid.dotted_string, str(attribute.value))
+    parts: List[str] = []
+    for oid, prefix in _NAME_FIELDS:
+        value = values.get(oid)
+        if value:
+            parts.append(prefix + value)
+    return ''.join(parts)
+
+
+def get_pretty_subject(cert: 'x509.Certificate') -> str:
     """ Get a pretty string with the subject and the issuer of a cert """
-    subject = 'subject=' + _get_pretty_name(cert.get_subject())
-    issuer = 'issuer=' + _get_pretty_name(cert.get_issuer())
+    subject = 'subject=' + _get_pretty_name(cert.subject)
+    issuer = 'issuer=' + _get_pretty_name(cert.issuer)
     return subject + '\n' + issuer + '\n'
 
 
+def _ia32cap_disables(cap, bit):
+    """ Tell if a OPENSSL_ia32cap word turns off the given capability bit
+
+    A word starting with ~ clears the bits it sets, otherwise it replaces the
+    detected capabilities. An empty or unparsable word changes nothing
+    """
+    try:
+        if cap.startswith('~'):
+            return bool(int(cap[1:], 0) & bit)
+        return not int(cap, 0) & bit
+    except ValueError:
+        return False
+
+def check_openssl_caps():
+    """ Warn if OPENSSL_ia32cap turns off the AES-NI or SHA extensions
+
+    OpenSSL falls back to its much slower generic code for hashing and
+    encryption in that case
+    """
+    ia32cap = os.environ.get('OPENSSL_ia32cap')
+    if not ia32cap:
+        return
+    caps = ia32cap.split(':')
+    disabled = []
+    if _ia32cap_disables(caps[0], IA32CAP_AESNI):
+        disabled.append('AES-NI')
+    if len(caps) > 1 and _ia32cap_disables(caps[1], IA32CAP_SHA):
+        disabled.append('SHA')
+    if disabled:
+        warnings.warn('OPENSSL_ia32cap=%s disables %s in OpenSSL, unset it to '
+                      'use the hardware accelerated code' %
+                      (ia32cap, ' and '.join(disabled)), RuntimeWarning,
+                      stacklevel=2)
+
+check_openssl_caps()
+
 
 @click.group()
 def cli():
@@ -236,11 +523,14 @@ def cli():
 @click.command()
 @click.option('--ca-dir', default='./ca',
               help='directory where the CA will be stored')
-def initca(ca_dir):
+@click.option('--key-type', default='rsa', type=click.Choice(KEY_TYPES),
+              help='type of the CA key pair')
+def initca(ca_dir, key_type):
     """ Initialize the CA directory
     This will create the inital files, including the CA key pair"""
     click.echo('Initiliasing new CA in %s' % ca_dir)
     sca = SimpleCA(ca_dir)
+    sca.key_type = key_type
     try:
         sca.init_ca()
     except FileExistsError as err:
@@ -251,14 +541,36 @@ def initca(ca_dir):
 @click.command()
 @click.option('--ca-dir', default='./ca',
               help='directory where the CA is stored')
+@click.option('--key-type', default='rsa', type=click.Choice(KEY_TYPES),
+              help='type of the certificate key pair')
+@click.option('--random-serials', is_flag=True,
+              help='use a random serial instead of the serial file')
 @click.argument('commonname')
-def create_cert(commonname, ca_dir):
+def create_cert(commonname, ca_dir, key_type, random_serials):
     """ Create a certificate with the specified COMMONNAME """
     sca = SimpleCA(ca_dir)
+    sca.key_type = key_type
+    sca.random_serials = random_serials
     sca.new_cert(commonname)
 
+@click.command()
+@click.option('--ca-dir', default='./ca',
+              help='directory where the CA is stored')
+@click.option('--key-type', default='rsa', type=click.Choice(KEY_TYPES),
+              help='type of the certificates key pairs')
+@click.option('--random-serials', is_flag=True,
+              help='use random serials instead of the serial file')
+@click.argument('commonnames', nargs=-1, required=True)
+def create_certs(commonnames, ca_dir, key_type, random_serials):
+    """ Create a certificate for each of the specified COMMONNAMES """
+    sca = SimpleCA(ca_dir)
+    sca.key_type = key_type
+    sca.random_serials = random_serials
+    sca.new_certs(commonnames)
+
 cli.add_command(initca)
 cli.add_command(create_cert)
+cli.add_command(create_certs)
 
 if __name__ == '__main__':
     cli()
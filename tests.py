@@ -1,19 +1,38 @@
 #!/usr/bin/env python3
 """ Unit tests  for simpleca """
 #pylint: disable=protected-access
+import gc
 import unittest
+import weakref
 import shutil
 import os.path
 import stat
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
 from datetime import datetime, timedelta
 
+from cryptography import x509
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.x509.oid import NameOID
 from OpenSSL import crypto
 import simpleca
 
 class TemplateTestCase(unittest.TestCase):
     """ Generic template to factorize setuup/teardown """
-    pass
+    def verify_cert(self, name):
+        """ Check the named certificate is signed by the CA and return it """
+        with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/ca.crt') as ca_file:
+            ca_cert = crypto.load_certificate(crypto.FILETYPE_PEM,
+                                              ca_file.read())
+        with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/' + name + '.crt') as cert_file:
+            cert = crypto.load_certificate(crypto.FILETYPE_PEM,
+                                           cert_file.read())
+        store = crypto.X509Store()
+        store.add_cert(ca_cert)
+        store_context = crypto.X509StoreContext(store, cert)
+        store_context.verify_certificate()
+        return cert
 
 
 class InitTestCase(TemplateTestCase):
@@ -62,14 +81,18 @@ class InitTestCase(TemplateTestCase):
             self.assertEqual(serial_number, '1000')
 
 class CaKeys(TemplateTestCase):
-    """ Checks the key and cert for the CA """
+    """ Checks the key and cert for the CA
+
+    Ed25519 keys are used as they are much faster to generate than RSA ones
+    """
     def setUp(self):
         self.ca_dir = './catest'
         self.sca = simpleca.SimpleCA(self.ca_dir)
-        self.sca.key_bits = 512
+        self.sca.key_type = 'ed25519'
         self.sca.init_ca()
 
     def tearDown(self):
+        self.sca.close()
         shutil.rmtree(self.ca_dir)
 
     def test_serial_create(self):
@@ -80,10 +103,16 @@ class CaKeys(TemplateTestCase):
             self.assertEqual(serial_number, '1001')
 
     def test_privkey(self):
-        """ check the privkey exists and is consistent """
+        """ check the privkey exists and is an Ed25519 key """
         with open(self.ca_dir + simpleca.PRIVATE_DIR_NAME + '/ca.key') as private_file:
             pkey = crypto.load_privatekey(crypto.FILETYPE_PEM, private_file.read())
-            self.assertTrue(pkey.check())
+            self.assertIsInstance(pkey.to_cryptography_key(),
+                                  ed25519.Ed25519PrivateKey)
+
+    def test_privkey_mode(self):
+        """ check the privkey is only readable by its owner """
+        key_stat = os.stat(self.ca_dir + simpleca.PRIVATE_DIR_NAME + '/ca.key')
+        self.assertEqual(stat.S_IMODE(key_stat.st_mode), 0o600)
 
     def test_ca_certificate(self):
         """ check if the certificate is auto signed """
@@ -98,13 +127,7 @@ class CaKeys(TemplateTestCase):
 
     def test_ca_certificate_time(self):
         """ check if the certificate is valid enough time """
-        with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/ca.crt') as cert_file:
-            cert = crypto.load_certificate(crypto.FILETYPE_PEM,
-                                           cert_file.read())
-        store = crypto.X509Store()
-        store.add_cert(cert)
-        store_context = crypto.X509StoreContext(store, cert)
-        store_context.verify_certificate()
+        self.verify_cert('ca')
 
     def test_new_certificate(self):
         """ check if the generated certificate is valid """
@@ -112,19 +135,36 @@ class CaKeys(TemplateTestCase):
         with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/test.crt') as cert_file:
             subject = cert_file.readline()
             issuer = cert_file.readline()
-            cert = crypto.load_certificate(crypto.FILETYPE_PEM,
-                                           cert_file.read())
             self.assertEqual(subject, 'subject=/CN=test\n')
             self.assertEqual(issuer, 'issuer=/CN=ca\n')
-        with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/ca.crt') as ca_file:
-            ca_cert = crypto.load_certificate(crypto.FILETYPE_PEM,
-                                              ca_file.read())
-        store = crypto.X509Store()
-        store.add_cert(ca_cert)
-        store_context = crypto.X509StoreContext(store, cert)
-        store_context.verify_certificate()
+        cert = self.verify_cert('test')
+        self.assertEqual(cert.get_signature_algorithm(), b'ED25519')
 
 
+    def test_new_certificate_loaded_ca(self):
+        """ check if the certificate is valid when the CA key is read back """
+        sca = simpleca.SimpleCA(self.ca_dir)
+        sca.key_type = 'ed25519'
+        try:
+            sca.new_cert('test')
+        finally:
+            sca.close()
+        self.verify_cert('test')
+
+    def test_new_certificate_threads(self):
+        """ check if certificates issued from several threads are valid """
+        sca = simpleca.SimpleCA(self.ca_dir)
+        sca.key_type = 'ed25519'
+        names = ['test%d' % i for i in range(4)]
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(sca.new_cert, names))
+        finally:
+            sca.close()
+        serials = {self.verify_cert(name).get_serial_number()
+                   for name in names}
+        self.assertEqual(serials, {1001, 1002, 1003, 1004})
+
     def test_new_certificate_time(self):
         """ check if the certificate is valid enough time """
         self.sca.new_cert('test')
@@ -136,8 +176,151 @@ class CaKeys(TemplateTestCase):
 
         self.assertEqual(exp.decode('ascii'), one_year.strftime('%Y%m%d%H%M%SZ'))
 
+    def test_new_certificates(self):
+        """ check if the certificates generated in batch are valid """
+        with mock.patch('concurrent.futures.ProcessPoolExecutor') as pool:
+            self.sca.new_certs(['test1', 'test2'])
+        start_dates = set()
+        for name in ['test1', 'test2']:
+            cert = self.verify_cert(name)
+            self.assertEqual(cert.get_subject().CN, name)
+            start_dates.add(cert.get_notBefore())
+        self.assertEqual(len(start_dates), 1)
+        pool.assert_not_called()
+        with open(self.ca_dir + simpleca.SERIAL_NAME) as serial:
+            self.assertEqual(serial.read(), '1003')
+
+    def test_dont_override_key(self):
+        """ check an existing key file is never overwritten """
+        key_path = self.ca_dir + simpleca.PRIVATE_DIR_NAME + '/1001_test.key'
+        with open(key_path, 'w') as key_file:
+            key_file.write('existing')
+        self.assertRaises(FileExistsError, self.sca.new_cert, 'test')
+        with open(key_path) as key_file:
+            self.assertEqual(key_file.read(), 'existing')
+        self.assertEqual(sorted(os.listdir(self.ca_dir + simpleca.PRIVATE_DIR_NAME)),
+                         ['1000_ca.key', '1001_test.key', 'ca.key'])
+
+    def test_index(self):
+        """ check the certificates are added to the index """
+        self.sca.new_cert('test')
+        with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/test.crt') as cert_file:
+            cert = crypto.load_certificate(crypto.FILETYPE_PEM,
+                                           cert_file.read())
+        expire = cert.get_notAfter()[2:].decode('ascii')
+        with open(self.ca_dir + simpleca.INDEX_NAME) as index:
+            entries = [line.split('\t') for line in index]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0][3:], ['03E8', 'unknown', '/CN=ca\n'])
+        self.assertEqual(entries[1], ['V', expire, '', '03E9', 'unknown',
+                                      '/CN=test\n'])
+
+    def test_index_released(self):
+        """ check an unused instance and its index descriptor are released """
+        sca = simpleca.SimpleCA(self.ca_dir)
+        sca.key_type = 'ed25519'
+        sca.new_cert('test')
+        index_fd = sca._index_fd
+        sca_ref = weakref.ref(sca)
+        del sca
+        gc.collect()
+        self.assertIsNone(sca_ref())
+        self.assertRaises(OSError, os.fstat, index_fd)
+
+    def test_random_serial(self):
+        """ check the random serials don't use the serial file """
+        self.sca.random_serials = True
+        self.sca.new_cert('test')
+        with open(self.ca_dir + simpleca.CERT_DIR_NAME + '/test.crt') as cert_file:
+            cert = crypto.load_certificate(crypto.FILETYPE_PEM,
+                                           cert_file.read())
+        self.assertNotEqual(cert.get_serial_number(), 1001)
+        self.assertLess(cert.get_serial_number(), 2**127)
+        with open(self.ca_dir + simpleca.SERIAL_NAME) as serial:
+            self.assertEqual(serial.read(), '1001')
+
+
+class CaRsaKeys(TemplateTestCase):
+    """ Checks the key and cert for a RSA CA """
+    def setUp(self):
+        self.ca_dir = './catest'
+        self.sca = simpleca.SimpleCA(self.ca_dir)
+        self.sca.key_bits = 1024
+        self.sca.init_ca()
+
+    def tearDown(self):
+        self.sca.close()
+        shutil.rmtree(self.ca_dir)
+
+    def test_new_certificate(self):
+        """ check if the generated certificate is valid """
+        self.sca.new_cert('test')
+        cert = self.verify_cert('test')
+        self.assertEqual(cert.get_signature_algorithm(),
+                         b'sha256WithRSAEncryption')
+
+    def test_new_certificates(self):
+        """ check if the certificates generated by the worker processes are valid """
+        self.sca.new_certs(['test1', 'test2'])
+        for name in ['test1', 'test2']:
+            cert = self.verify_cert(name)
+            self.assertEqual(cert.get_subject().CN, name)
+
+    def test_privkey(self):
+        """ check the privkey exists and is consistent """
+        with open(self.ca_dir + simpleca.PRIVATE_DIR_NAME + '/ca.key') as private_file:
+            pkey = crypto.load_privatekey(crypto.FILETYPE_PEM, private_file.read())
+            self.assertTrue(pkey.check())
+            self.assertEqual(pkey.bits(), 1024)
+
+
+class PrettyPrint(TemplateTestCase):
+    """ Checks the pretty printing of the names """
+    def test_pretty_name(self):
+        """ check the fields order and the empty fields """
+        name = x509.Name([
+            x509.NameAttribute(NameOID.COMMON_NAME, 'test'),
+            x509.NameAttribute(NameOID.COUNTRY_NAME, 'FR'),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, 'Simple CA'),
+        ])
+        self.assertEqual(simpleca._get_pretty_name(name),
+                         '/C=FR/O=Simple CA/CN=test')
+
+    def test_pretty_empty_name(self):
+        """ check an empty name """
+        name = x509.Name([])
+        self.assertEqual(simpleca._get_pretty_name(name), '')
+
+
+class OpensslCaps(TemplateTestCase):
+    """ Checks the OPENSSL_ia32cap warnings """
+    def check_caps(self, ia32cap):
+        """ Run the check with the given OPENSSL_ia32cap value """
+        with mock.patch.dict(os.environ, {'OPENSSL_ia32cap': ia32cap}):
+            simpleca.check_openssl_caps()
+
+    def test_aesni_masked(self):
+        """ check a mask clearing AES-NI warns """
+        with self.assertWarnsRegex(RuntimeWarning, 'AES-NI'):
+            self.check_caps('~0x200000000000000')
+
+    def test_sha_masked(self):
+        """ check a mask clearing SHA warns """
+        with self.assertWarnsRegex(RuntimeWarning, 'SHA'):
+            self.check_caps(':~0x20000000')
+
+    def test_aesni_masked_bad_sha_word(self):
+        """ check an unparsable second word doesn't hide the AES-NI warning """
+        with self.assertWarnsRegex(RuntimeWarning, 'AES-NI'):
+            self.check_caps('~0x200000000000000:junk')
+
+    def test_other_mask(self):
+        """ check a mask keeping AES-NI and SHA doesn't warn """
+        with mock.patch('warnings.warn') as warn:
+            self.check_caps('~0x1000000:~0x1')
+            self.check_caps('garbage')
+        warn.assert_not_called()
 
-#class PrettyPrint(unittest.TestCase)
 
 if __name__ == '__main__':
     unittest.main()